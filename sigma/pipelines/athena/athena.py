@@ -1,6 +1,9 @@
+import string
 from dataclasses import dataclass, field
-from typing import Dict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
 
+from sigma.correlations import SigmaCorrelationRule
 from sigma.pipelines.base import Pipeline
 from sigma.processing.conditions import LogsourceCondition
 from sigma.processing.pipeline import (
@@ -10,97 +13,234 @@ from sigma.processing.pipeline import (
     SigmaRule,
 )
 
+_FORMATTER = string.Formatter()
+
+_DASH_TO_UNDERSCORE = str.maketrans("-", "_")
+
 
 @dataclass
-class SetStateFromBackendOptionsTransformation(PreprocessingTransformation):
-    key: str
+class _Template:
+    """
+    Template split once into its literal parts and placeholder names, so substitution is
+    a plain join rather than a run of the format parser. Templates using more than plain
+    named placeholders (format specs, conversions, attribute or index access) are left
+    to str.format_map.
+    """
+
     template: str
-    default_values: Dict[str, str] = field(default_factory=dict)
+    _literal_parts: Optional[Tuple[str, ...]] = field(init=False, default=None)
+    _key_names: Tuple[str, ...] = field(init=False, default=())
 
-    def apply(self, rule: SigmaRule) -> None:
-        # Call base (no pipeline arg)
-        super().apply(rule)
+    def __post_init__(self) -> None:
+        try:
+            parsed = list(_FORMATTER.parse(self.template))
+        except ValueError as e:
+            raise ValueError(
+                f"Invalid table name template '{self.template}': {e}"
+            ) from e
 
-        # Use the pipeline injected by PySigma
-        pipeline = self._pipeline
+        # str.format semantics: {{ and }} are already unescaped in the literal text.
+        literal_parts = [""]
+        key_names = []
+        for literal, name, format_spec, conversion in parsed:
+            literal_parts[-1] += literal
+            if name is None:
+                continue
+            if not name.isidentifier() or format_spec or conversion:
+                return
+            key_names.append(name)
+            literal_parts.append("")
+        self._literal_parts = tuple(literal_parts)
+        self._key_names = tuple(key_names)
 
-        # Merge defaults with backend options/vars
-        values = {**self.default_values, **pipeline.vars}
+    def substitute(self, key: str, values: Dict[str, str]) -> str:
         try:
-            pipeline.state[self.key] = self.template.format_map(values)
+            if self._literal_parts is None:
+                return self.template.format_map(values)
+            substitutions = [str(values[name]) for name in self._key_names]
         except KeyError as e:
             missing_key = e.args[0]
             raise KeyError(
-                f"Missing key '{missing_key}' in template substitution for '{self.key}'. "
+                f"Missing key '{missing_key}' in template substitution for '{key}'. "
                 f"Available keys: {list(values.keys())}. "
                 f"You likely need to set the key '{missing_key}' via 'backend options'."
             ) from e
 
+        # Interleave the literal parts with the placeholder values
+        result = [self._literal_parts[0]]
+        for substitution, literal in zip(substitutions, self._literal_parts[1:]):
+            result.append(substitution)
+            result.append(literal)
+        return "".join(result)
+
+
+def _dash_to_underscore(value: str) -> str:
+    """Normalise dashes (e.g. from an AWS region) to underscores."""
+    if "-" not in value:
+        return value
+    return value.translate(_DASH_TO_UNDERSCORE)
+
+
+def _lookup_source(
+    rule: Union[SigmaRule, SigmaCorrelationRule], lookup: Mapping[Tuple[str, str], Any]
+) -> Optional[Tuple[str, str]]:
+    """Return the (product, service) key of a rule, if it is in the lookup."""
+    if isinstance(rule, SigmaRule):
+        source = (rule.logsource.product, rule.logsource.service)
+        return source if source in lookup else None
+
+    sources = set()
+    for reference in rule.referenced_rules:
+        referenced_rule = getattr(reference, "rule", None)
+        if isinstance(referenced_rule, (SigmaRule, SigmaCorrelationRule)):
+            source = _lookup_source(referenced_rule, lookup)
+            if source is not None:
+                sources.add(source)
+
+    # Correlation rules have no log source of their own. Use the referenced source
+    # that comes last in the lookup, as one processing item per source would.
+    return next((source for source in reversed(lookup) if source in sources), None)
+
+
+@dataclass
+class _SetStateFromTemplateTransformation(PreprocessingTransformation):
+    key: str
+    # Accepts a mapping or (key, value) pairs, stored as a tuple of pairs.
+    default_values: Union[Mapping[str, str], Tuple[Tuple[str, str], ...]] = field(
+        default=(), kw_only=True
+    )
+    # Substituted values only depend on pipeline-level vars, so each is computed once
+    # per pipeline rather than once per rule.
+    _cached_values: Dict[Any, str] = field(
+        init=False, compare=False, repr=False, default_factory=dict
+    )
+
+    def __post_init__(self) -> None:
+        self.default_values = tuple(dict(self.default_values).items())
+
+    def set_pipeline(self, pipeline: ProcessingPipeline) -> None:
+        super().set_pipeline(pipeline)
+        self._cached_values.clear()
+
+    def _set_state(self, cache_key: Any, template: _Template) -> None:
+        value = self._cached_values.get(cache_key)
+        if value is None:
+            # Merge defaults with backend options/vars
+            values = dict(self.default_values)
+            values.update(self._pipeline.vars)
+            value = self._normalise(template.substitute(self.key, values))
+            self._cached_values[cache_key] = value
+        self._pipeline.state[self.key] = value
+
+    def _normalise(self, value: str) -> str:
+        return value
+
+
+class _DashToUnderscoreMixin:
+    def _normalise(self, value: str) -> str:
+        return _dash_to_underscore(value)
+
+
+@dataclass
+class SetStateFromBackendOptionsTransformation(_SetStateFromTemplateTransformation):
+    template: str
+    _template: _Template = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        self._template = _Template(self.template)
+
+    def apply(self, rule: SigmaRule) -> None:
+        # Call base (no pipeline arg)
+        super().apply(rule)
+        self._set_state(None, self._template)
+
 
 @dataclass
 class SetStateFromBackendOptionsTransformationDashToUnderscore(
-    SetStateFromBackendOptionsTransformation
+    _DashToUnderscoreMixin, SetStateFromBackendOptionsTransformation
 ):
-    def apply(self, rule: SigmaRule) -> None:
-        # First, compute the value via the parent
+    pass
+
+
+@dataclass
+class SetStateFromLogsourceLookupTransformation(_SetStateFromTemplateTransformation):
+    # Accepts a mapping or ((product, service), template) pairs, stored as a tuple of
+    # pairs so it cannot change after the templates below are built from it.
+    lookup: Union[
+        Mapping[Tuple[str, str], str], Tuple[Tuple[Tuple[str, str], str], ...]
+    ]
+    _templates: Dict[Tuple[str, str], _Template] = field(
+        init=False, compare=False, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        self.lookup = tuple(dict(self.lookup).items())
+        self._templates = {
+            source: _Template(template) for source, template in self.lookup
+        }
+
+    def apply(self, rule: Union[SigmaRule, SigmaCorrelationRule]) -> None:
+        source = _lookup_source(rule, self._templates)
+        if source is None:
+            return
+
         super().apply(rule)
+        self._set_state(source, self._templates[source])
+
+
+@dataclass
+class SetStateFromLogsourceLookupTransformationDashToUnderscore(
+    _DashToUnderscoreMixin, SetStateFromLogsourceLookupTransformation
+):
+    pass
+
+
+# (service, Security Lake table) for each AWS log source stored in Security Lake.
+_SECURITY_LAKE_SERVICE_TABLES: Tuple[Tuple[str, str], ...] = (
+    ("cloudtrail", "cloud_trail_mgmt"),
+    ("cloudtrail_s3", "s3_data"),
+    ("cloudtrail_lambda", "lambda_execution"),
+    ("route53", "route53"),
+    ("security_hub", "sh_findings"),
+    ("vpc_flow_logs", "vpc_flow"),
+    ("waf", "waf"),
+    ("eks_audit", "eks_audit"),
+)
+
+# Table name template keyed by (product, service), so a rule's table is found with a
+# single lookup.
+_SECURITY_LAKE_TABLE_NAMES: Mapping[Tuple[str, str], str] = MappingProxyType(
+    {
+        ("aws", service): "amazon_security_lake_table_{backend_aws_table_region}_"
+        + table
+        + "_{backend_aws_table_version}"
+        for service, table in _SECURITY_LAKE_SERVICE_TABLES
+    }
+)
 
-        # Then normalise dashes to underscores
-        pipeline = self._pipeline
-        pipeline.state[self.key] = pipeline.state[self.key].replace("-", "_")
+
+_ALLOWED_BACKENDS = frozenset({"athena"})
 
 
 @Pipeline
 def athena_pipeline_security_lake_table_name() -> ProcessingPipeline:
-    sources = [
-        (
-            LogsourceCondition(product="aws", service="cloudtrail"),
-            "amazon_security_lake_table_{backend_aws_table_region}_cloud_trail_mgmt_{backend_aws_table_version}",
-        ),
-        (
-            LogsourceCondition(product="aws", service="cloudtrail_s3"),
-            "amazon_security_lake_table_{backend_aws_table_region}_s3_data_{backend_aws_table_version}",
-        ),
-        (
-            LogsourceCondition(product="aws", service="cloudtrail_lambda"),
-            "amazon_security_lake_table_{backend_aws_table_region}_lambda_execution_{backend_aws_table_version}",
-        ),
-        (
-            LogsourceCondition(product="aws", service="route53"),
-            "amazon_security_lake_table_{backend_aws_table_region}_route53_{backend_aws_table_version}",
-        ),
-        (
-            LogsourceCondition(product="aws", service="security_hub"),
-            "amazon_security_lake_table_{backend_aws_table_region}_sh_findings_{backend_aws_table_version}",
-        ),
-        (
-            LogsourceCondition(product="aws", service="vpc_flow_logs"),
-            "amazon_security_lake_table_{backend_aws_table_region}_vpc_flow_{backend_aws_table_version}",
-        ),
-        (
-            LogsourceCondition(product="aws", service="waf"),
-            "amazon_security_lake_table_{backend_aws_table_region}_waf_{backend_aws_table_version}",
-        ),
-        (
-            LogsourceCondition(product="aws", service="eks_audit"),
-            "amazon_security_lake_table_{backend_aws_table_region}_eks_audit_{backend_aws_table_version}",
-        ),
-    ]
-
     return ProcessingPipeline(
         name="athena map source to table name pipeline",
-        allowed_backends=frozenset(["athena"]),
+        allowed_backends=_ALLOWED_BACKENDS,
         priority=20,
         items=[
             ProcessingItem(
-                identifier=f"table_{name}",
-                transformation=SetStateFromBackendOptionsTransformationDashToUnderscore(
+                identifier="security_lake_table_name",
+                transformation=SetStateFromLogsourceLookupTransformationDashToUnderscore(
                     key="table_name",
-                    template=name,
-                    default_values={"backend_aws_table_version": "2_0"},
+                    lookup=_SECURITY_LAKE_TABLE_NAMES,
+                    default_values=(("backend_aws_table_version", "2_0"),),
                 ),
-                rule_conditions=[condition],
+                # Unmapped AWS services pass this condition, so the item counts as
+                # applied for them even though no table name is set.
+                rule_conditions=[LogsourceCondition(product="aws")],
             )
-            for condition, name in sources
         ],
     )
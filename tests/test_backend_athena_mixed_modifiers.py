@@ -4,8 +4,21 @@ from sigma.exceptions import SigmaValueError
 
 from sigma.backends.athena import athenaBackend
 
-
-@pytest.fixture
+# Single-selection rule shared by the parametrized tests below.
+YAML_TEMPLATE = """
+    title: Mixed modifiers
+    status: test
+    logsource:
+        category: test_category
+        product: test_product
+    detection:
+        sel:
+          {field}: {value}
+        condition: sel
+"""
+
+
+@pytest.fixture(scope="module")
 def athena_backend():
     return athenaBackend(element_at_fields=["unmapped"])
 
@@ -15,67 +28,22 @@ def athena_backend():
 # -----------------------------------------------------------------------------
 
 
-def test_athena_cased_contains(athena_backend: athenaBackend):
-    assert (
-        athena_backend.convert(
-            SigmaCollection.from_yaml(
-                """
-            title: Cased + Contains
-            status: test
-            logsource:
-                category: test_category
-                product: test_product
-            detection:
-                sel:
-                  fieldA|cased|contains: SubString
-                condition: sel
-        """
-            )
-        )
-        == [r"SELECT * FROM <TABLE> WHERE fieldA LIKE '%SubString%' ESCAPE '\'"]
-    )
-
-
-def test_athena_cased_startswith(athena_backend: athenaBackend):
-    assert (
-        athena_backend.convert(
-            SigmaCollection.from_yaml(
-                """
-            title: Cased + StartsWith
-            status: test
-            logsource:
-                category: test_category
-                product: test_product
-            detection:
-                sel:
-                  fieldA|cased|startswith: Prefix
-                condition: sel
-        """
-            )
-        )
-        == [r"SELECT * FROM <TABLE> WHERE fieldA LIKE 'Prefix%' ESCAPE '\'"]
-    )
-
-
-def test_athena_cased_endswith(athena_backend: athenaBackend):
-    assert (
-        athena_backend.convert(
-            SigmaCollection.from_yaml(
-                """
-            title: Cased + EndsWith
-            status: test
-            logsource:
-                category: test_category
-                product: test_product
-            detection:
-                sel:
-                  fieldA|cased|endswith: Suffix
-                condition: sel
-        """
-            )
+@pytest.mark.parametrize(
+    "modifier,value,expected_like",
+    [
+        ("contains", "SubString", "%SubString%"),
+        ("startswith", "Prefix", "Prefix%"),
+        ("endswith", "Suffix", "%Suffix"),
+    ],
+)
+def test_athena_cased_string_match(
+    athena_backend: athenaBackend, modifier: str, value: str, expected_like: str
+):
+    assert athena_backend.convert(
+        SigmaCollection.from_yaml(
+            YAML_TEMPLATE.format(field=f"fieldA|cased|{modifier}", value=value)
         )
-        == [r"SELECT * FROM <TABLE> WHERE fieldA LIKE '%Suffix' ESCAPE '\'"]
-    )
+    ) == [rf"SELECT * FROM <TABLE> WHERE fieldA LIKE '{expected_like}' ESCAPE '\'"]
 
 
 # -----------------------------------------------------------------------------
@@ -133,52 +101,29 @@ def test_athena_not_fieldref_case_insensitive(athena_backend: athenaBackend):
 # -----------------------------------------------------------------------------
 
 
-def test_athena_element_at_contains(athena_backend: athenaBackend):
-    # Non-cased path should use LOWER(element_at(...)) and lowercase literal wrapped in %...%
-    assert (
-        athena_backend.convert(
-            SigmaCollection.from_yaml(
-                """
-            title: element_at + contains (non-cased)
-            status: test
-            logsource:
-                category: test_category
-                product: test_product
-            detection:
-                sel:
-                  unmapped.serviceEventDetails.account_id|contains: "123"
-                condition: sel
-        """
-            )
-        )
-        == [
-            r"SELECT * FROM <TABLE> WHERE LOWER(element_at(unmapped, 'serviceEventDetails.account_id')) LIKE '%123%' ESCAPE '\'"
-        ]
-    )
-
-
-def test_athena_element_at_cased_startswith(athena_backend: athenaBackend):
-    # Cased path should remove LOWER and preserve literal casing
-    assert (
-        athena_backend.convert(
-            SigmaCollection.from_yaml(
-                """
-            title: element_at + cased + startswith
-            status: test
-            logsource:
-                category: test_category
-                product: test_product
-            detection:
-                sel:
-                  unmapped.serviceEventDetails.account_id|cased|startswith: AWS
-                condition: sel
-        """
-            )
-        )
-        == [
-            r"SELECT * FROM <TABLE> WHERE element_at(unmapped, 'serviceEventDetails.account_id') LIKE 'AWS%' ESCAPE '\'"
-        ]
-    )
+@pytest.mark.parametrize(
+    "field,value,expected",
+    [
+        # Non-cased path should use LOWER(element_at(...)) and lowercase literal wrapped in %...%
+        (
+            "unmapped.serviceEventDetails.account_id|contains",
+            '"123"',
+            r"SELECT * FROM <TABLE> WHERE LOWER(element_at(unmapped, 'serviceEventDetails.account_id')) LIKE '%123%' ESCAPE '\'",
+        ),
+        # Cased path should remove LOWER and preserve literal casing
+        (
+            "unmapped.serviceEventDetails.account_id|cased|startswith",
+            "AWS",
+            r"SELECT * FROM <TABLE> WHERE element_at(unmapped, 'serviceEventDetails.account_id') LIKE 'AWS%' ESCAPE '\'",
+        ),
+    ],
+)
+def test_athena_element_at_string_match(
+    athena_backend: athenaBackend, field: str, value: str, expected: str
+):
+    assert athena_backend.convert(
+        SigmaCollection.from_yaml(YAML_TEMPLATE.format(field=field, value=value))
+    ) == [expected]
 
 
 # -----------------------------------------------------------------------------
@@ -251,47 +196,26 @@ def test_athena_contains_list_with_literal_star_and_question(
 # -----------------------------------------------------------------------------
 
 
-def test_athena_special_field_name_with_endswith(athena_backend: athenaBackend):
-    # Non-cased path with quoted identifier and lowercase literal for LIKE
-    assert (
-        athena_backend.convert(
-            SigmaCollection.from_yaml(
-                """
-            title: EndsWith on quoted field name
-            status: test
-            logsource:
-                category: test_category
-                product: test_product
-            detection:
-                sel:
-                  field name|endswith: S
-                condition: sel
-        """
-            )
-        )
-        == [r"""SELECT * FROM <TABLE> WHERE LOWER("field name") LIKE '%s' ESCAPE '\'"""]
-    )
-
-
-def test_athena_escaped_dot_with_contains(athena_backend: athenaBackend):
-    # actor.user\\.uid must be treated as actor."user.uid"
-    assert (
-        athena_backend.convert(
-            SigmaCollection.from_yaml(
-                """
-            title: Contains on escaped dotted field
-            status: test
-            logsource:
-                category: test_category
-                product: test_product
-            detection:
-                sel:
-                  actor.user\\.uid|contains: "123"
-                condition: sel
-        """
-            )
-        )
-        == [
-            r"""SELECT * FROM <TABLE> WHERE LOWER(actor."user.uid") LIKE '%123%' ESCAPE '\'"""
-        ]
-    )
+@pytest.mark.parametrize(
+    "field,value,expected",
+    [
+        # Non-cased path with quoted identifier and lowercase literal for LIKE
+        (
+            "field name|endswith",
+            "S",
+            r"""SELECT * FROM <TABLE> WHERE LOWER("field name") LIKE '%s' ESCAPE '\'""",
+        ),
+        # actor.user\\.uid must be treated as actor."user.uid"
+        (
+            "actor.user\\.uid|contains",
+            '"123"',
+            r"""SELECT * FROM <TABLE> WHERE LOWER(actor."user.uid") LIKE '%123%' ESCAPE '\'""",
+        ),
+    ],
+)
+def test_athena_special_field_name_string_match(
+    athena_backend: athenaBackend, field: str, value: str, expected: str
+):
+    assert athena_backend.convert(
+        SigmaCollection.from_yaml(YAML_TEMPLATE.format(field=field, value=value))
+    ) == [expected]
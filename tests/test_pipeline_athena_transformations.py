@@ -0,0 +1,158 @@
+import pytest
+from sigma.collection import SigmaCollection
+from sigma.processing.pipeline import ProcessingItem, ProcessingPipeline
+
+from sigma.backends.athena import athenaBackend
+from sigma.pipelines.athena.athena import (
+    SetStateFromBackendOptionsTransformation,
+    SetStateFromBackendOptionsTransformationDashToUnderscore,
+)
+
+RULE = """
+    title: Test
+    status: test
+    logsource:
+        product: aws
+        service: cloudtrail
+    detection:
+        sel:
+            fieldA: valueA
+        condition: sel
+"""
+
+
+def convert_table_name(transformation, **backend_options) -> str:
+    pipeline = ProcessingPipeline(
+        items=[ProcessingItem(transformation=transformation)],
+    )
+    athena_backend = athenaBackend(processing_pipeline=pipeline, **backend_options)
+    query = athena_backend.convert(SigmaCollection.from_yaml(RULE))[0]
+    return query.split(" ")[3]
+
+
+def test_backend_options_transformation():
+    assert (
+        convert_table_name(
+            SetStateFromBackendOptionsTransformation(
+                key="table_name",
+                template="lake_{backend_aws_table_region}_{backend_aws_table_version}",
+                default_values={"backend_aws_table_version": "2_0"},
+            ),
+            aws_table_region="eu-west-2",
+        )
+        == "lake_eu-west-2_2_0"
+    )
+
+
+def test_backend_options_transformation_option_overrides_default():
+    assert (
+        convert_table_name(
+            SetStateFromBackendOptionsTransformation(
+                key="table_name",
+                template="lake_{backend_aws_table_version}",
+                default_values={"backend_aws_table_version": "2_0"},
+            ),
+            aws_table_version="1_0",
+        )
+        == "lake_1_0"
+    )
+
+
+def test_backend_options_transformation_dash_to_underscore():
+    assert (
+        convert_table_name(
+            SetStateFromBackendOptionsTransformationDashToUnderscore(
+                key="table_name",
+                template="lake-{backend_aws_table_region}",
+            ),
+            aws_table_region="eu-west-2",
+        )
+        == "lake_eu_west_2"
+    )
+
+
+def test_backend_options_transformation_cache_reset_between_backends():
+    pipeline = ProcessingPipeline(
+        items=[
+            ProcessingItem(
+                transformation=SetStateFromBackendOptionsTransformationDashToUnderscore(
+                    key="table_name",
+                    template="lake_{backend_aws_table_region}",
+                )
+            )
+        ],
+    )
+    rule = SigmaCollection.from_yaml(RULE)
+    eu_backend = athenaBackend(
+        processing_pipeline=pipeline, aws_table_region="eu-west-2"
+    )
+    us_backend = athenaBackend(
+        processing_pipeline=pipeline, aws_table_region="us-east-1"
+    )
+
+    assert eu_backend.convert(rule)[0].split(" ")[3] == "lake_eu_west_2"
+    assert us_backend.convert(rule)[0].split(" ")[3] == "lake_us_east_1"
+    assert eu_backend.convert(rule)[0].split(" ")[3] == "lake_eu_west_2"
+
+
+def test_backend_options_transformation_missing_key():
+    with pytest.raises(
+        KeyError,
+        match="Missing key 'backend_aws_table_region' in template substitution for 'table_name'",
+    ):
+        convert_table_name(
+            SetStateFromBackendOptionsTransformation(
+                key="table_name",
+                template="lake_{backend_aws_table_region}",
+            )
+        )
+
+
+def test_template_escaped_braces():
+    assert (
+        convert_table_name(
+            SetStateFromBackendOptionsTransformation(
+                key="table_name",
+                template="{{literal}}_{backend_aws_table_region}",
+            ),
+            aws_table_region="eu-west-2",
+        )
+        == "{literal}_eu-west-2"
+    )
+
+
+def test_template_format_spec():
+    assert (
+        convert_table_name(
+            SetStateFromBackendOptionsTransformation(
+                key="table_name",
+                template="t_{backend_aws_table_region:_>12}",
+            ),
+            aws_table_region="eu-west-2",
+        )
+        == "t____eu-west-2"
+    )
+
+
+@pytest.mark.parametrize(
+    "template",
+    ["{backend_aws_table_region", "backend_aws_table_region}", "t_{}_{"],
+)
+def test_template_malformed(template):
+    with pytest.raises(ValueError, match="Invalid table name template"):
+        SetStateFromBackendOptionsTransformation(key="table_name", template=template)
+
+
+@pytest.mark.parametrize(
+    "default_values",
+    [{"backend_aws_table_version": "2_0"}, (("backend_aws_table_version", "2_0"),)],
+)
+def test_default_values_mapping_or_pairs(default_values):
+    transformation = SetStateFromBackendOptionsTransformation(
+        key="table_name",
+        template="t_{backend_aws_table_version}",
+        default_values=default_values,
+    )
+
+    assert transformation.default_values == (("backend_aws_table_version", "2_0"),)
+    assert convert_table_name(transformation) == "t_2_0"
@@ -1,8 +1,11 @@
 import pytest
 from sigma.collection import SigmaCollection
+from sigma.processing.conditions import LogsourceCondition
+from sigma.processing.pipeline import ProcessingItem, ProcessingPipeline
 
 from sigma.backends.athena import athenaBackend
 from sigma.pipelines.athena import athena_pipeline_security_lake_table_name
+from sigma.pipelines.athena.athena import SetStateFromLogsourceLookupTransformation
 
 
 @pytest.fixture
@@ -241,3 +244,253 @@ def test_table_name_no_region_set():
 
         # Check that the expected missing key is in the error message
         assert "aws_table_region" in str(exc_info.value)
+
+
+def test_table_name_region_not_shared_between_backends():
+    pipeline = athena_pipeline_security_lake_table_name()
+    rule = SigmaCollection.from_yaml(
+        """
+            title: Test
+            status: test
+            logsource:
+                product: aws
+                service: cloudtrail
+            detection:
+                sel:
+                    fieldA: valueA
+                condition: sel
+        """
+    )
+
+    assert athenaBackend(
+        processing_pipeline=pipeline, aws_table_region="eu-west-2"
+    ).convert(rule) == [
+        "SELECT * FROM amazon_security_lake_table_eu_west_2_cloud_trail_mgmt_2_0 WHERE LOWER(fieldA) = 'valuea'"
+    ]
+    assert athenaBackend(
+        processing_pipeline=pipeline, aws_table_region="us-east-1"
+    ).convert(rule) == [
+        "SELECT * FROM amazon_security_lake_table_us_east_1_cloud_trail_mgmt_2_0 WHERE LOWER(fieldA) = 'valuea'"
+    ]
+
+
+def test_table_name_unmapped_sources(athena_backend):
+    assert (
+        athena_backend.convert(
+            SigmaCollection.from_yaml(
+                """
+            title: Unknown AWS service
+            status: test
+            logsource:
+                product: aws
+                service: guardduty
+            detection:
+                sel:
+                    fieldA: valueA
+                condition: sel
+---
+            title: Non-AWS source
+            status: test
+            logsource:
+                product: windows
+                service: security
+            detection:
+                sel:
+                    fieldA: valueA
+                condition: sel
+        """
+            )
+        )
+        == [
+            "SELECT * FROM <TABLE> WHERE LOWER(fieldA) = 'valuea'",
+            "SELECT * FROM <TABLE> WHERE LOWER(fieldA) = 'valuea'",
+        ]
+    )
+
+
+def test_table_name_unmapped_source_applied(athena_backend):
+    athena_backend.convert(
+        SigmaCollection.from_yaml(
+            """
+            title: Unknown AWS service
+            status: test
+            logsource:
+                product: aws
+                service: guardduty
+            detection:
+                sel:
+                    fieldA: valueA
+                condition: sel
+        """
+        )
+    )
+
+    # The item matches on product only, so it counts as applied although no table
+    # name was set for the unmapped service.
+    assert athena_backend.last_processing_pipeline.applied_ids == {
+        "security_lake_table_name"
+    }
+    assert "table_name" not in athena_backend.last_processing_pipeline.state
+
+
+def test_table_name_correlation(athena_backend):
+    assert athena_backend.convert(
+        SigmaCollection.from_yaml(
+            """
+title: CloudTrail rule
+name: cloudtrail_rule
+status: test
+logsource:
+    product: aws
+    service: cloudtrail
+detection:
+    sel:
+        eventName: ConsoleLogin
+    condition: sel
+---
+title: WAF rule
+name: waf_rule
+status: test
+logsource:
+    product: aws
+    service: waf
+detection:
+    sel:
+        action: BLOCK
+    condition: sel
+---
+title: Correlation
+status: test
+correlation:
+    type: event_count
+    rules:
+        - cloudtrail_rule
+        - waf_rule
+    group-by:
+        - src_ip
+    timespan: 1h
+    condition:
+        gte: 3
+        """
+        )
+    ) == [
+        "WITH combined_events AS ("
+        "SELECT * FROM amazon_security_lake_table_eu_west_2_cloud_trail_mgmt_2_0 WHERE LOWER(eventName) = 'consolelogin' "
+        "UNION ALL "
+        "SELECT * FROM amazon_security_lake_table_eu_west_2_waf_2_0 WHERE LOWER(action) = 'block'), "
+        "event_counts AS (SELECT *, COUNT(*) OVER (PARTITION BY src_ip ORDER BY time RANGE BETWEEN INTERVAL '3600' SECOND PRECEDING AND CURRENT ROW) as correlation_event_count FROM combined_events) "
+        "SELECT * FROM event_counts WHERE correlation_event_count >= 3"
+    ]
+    # The correlation rule itself is matched through its referenced rules. The
+    # referenced source listed last in the Security Lake table names wins.
+    assert athena_backend.last_processing_pipeline.applied_ids == {
+        "security_lake_table_name"
+    }
+    assert (
+        athena_backend.last_processing_pipeline.state["table_name"]
+        == "amazon_security_lake_table_eu_west_2_waf_2_0"
+    )
+
+
+def test_table_name_interleaved_backends():
+    rule = SigmaCollection.from_yaml(
+        """
+            title: Test
+            status: test
+            logsource:
+                product: aws
+                service: cloudtrail
+            detection:
+                sel:
+                    fieldA: valueA
+                condition: sel
+        """
+    )
+    eu_backend = athenaBackend(
+        processing_pipeline=athena_pipeline_security_lake_table_name(),
+        aws_table_region="eu-west-2",
+    )
+    us_backend = athenaBackend(
+        processing_pipeline=athena_pipeline_security_lake_table_name(),
+        aws_table_region="us-east-1",
+    )
+
+    eu_query = "SELECT * FROM amazon_security_lake_table_eu_west_2_cloud_trail_mgmt_2_0 WHERE LOWER(fieldA) = 'valuea'"
+    us_query = "SELECT * FROM amazon_security_lake_table_us_east_1_cloud_trail_mgmt_2_0 WHERE LOWER(fieldA) = 'valuea'"
+
+    assert eu_backend.convert(rule) == [eu_query]
+    assert us_backend.convert(rule) == [us_query]
+    # convert_rule reuses the pipeline set up by the last convert() of each backend
+    assert eu_backend.convert_rule(rule.rules[0]) == [eu_query]
+    assert us_backend.convert_rule(rule.rules[0]) == [us_query]
+
+
+def test_pipeline_not_shared_between_calls():
+    pipeline = athena_pipeline_security_lake_table_name()
+    pipeline.vars["backend_aws_table_version"] = "1_0"
+
+    assert athena_pipeline_security_lake_table_name() is not pipeline
+    assert athena_pipeline_security_lake_table_name().vars == {}
+
+
+def test_logsource_lookup_transformation():
+    pipeline = ProcessingPipeline(
+        items=[
+            ProcessingItem(
+                transformation=SetStateFromLogsourceLookupTransformation(
+                    key="table_name",
+                    lookup={("windows", "security"): "{backend_database}.win-security"},
+                ),
+                rule_conditions=[LogsourceCondition(product="windows")],
+            )
+        ],
+    )
+    athena_backend = athenaBackend(processing_pipeline=pipeline, database="logs")
+
+    assert (
+        athena_backend.convert(
+            SigmaCollection.from_yaml(
+                """
+            title: Test
+            status: test
+            logsource:
+                product: windows
+                service: security
+            detection:
+                sel:
+                    fieldA: valueA
+                condition: sel
+        """
+            )
+        )
+        == ["SELECT * FROM logs.win-security WHERE LOWER(fieldA) = 'valuea'"]
+    )
+
+
+def test_logsource_lookup_transformation_lookup_is_frozen():
+    lookup = {("windows", "security"): "win_security"}
+    transformation = SetStateFromLogsourceLookupTransformation(
+        key="table_name", lookup=lookup
+    )
+    lookup[("windows", "security")] = "changed"
+
+    assert transformation.lookup == ((("windows", "security"), "win_security"),)
+    pipeline = ProcessingPipeline(
+        items=[ProcessingItem(transformation=transformation)],
+    )
+
+    assert athenaBackend(processing_pipeline=pipeline).convert(
+        SigmaCollection.from_yaml(
+            """
+            title: Test
+            status: test
+            logsource:
+                product: windows
+                service: security
+            detection:
+                sel:
+                    fieldA: valueA
+                condition: sel
+        """
+        )
+    ) == ["SELECT * FROM win_security WHERE LOWER(fieldA) = 'valuea'"]